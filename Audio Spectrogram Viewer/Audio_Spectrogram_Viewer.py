@@ -1,113 +1,279 @@
 ﻿import numpy as np
 import matplotlib.pyplot as plt
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QPushButton, QFileDialog,
-                             QScrollArea, QLabel, QVBoxLayout, QWidget, QMessageBox, QHBoxLayout, QSlider)
-from PyQt5.QtGui import QImage, QPixmap, QPainter, QColor, QPen
-from PyQt5.QtCore import Qt, QTimer
+                             QAbstractScrollArea, QLabel, QVBoxLayout, QWidget, QMessageBox, QHBoxLayout, QSlider)
+from PyQt5.QtGui import QImage, QPainter, QColor, QPen
+from PyQt5.QtCore import Qt, QTimer, QUrl
+from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
 import soundfile as sf
+try:
+    from scipy.fft import rfft, rfftfreq, next_fast_len
+except ImportError:
+    rfft = None
+    from numpy.fft import rfftfreq
+
+    def next_fast_len(target, real=True):
+        return target
 import os
+import math
 import logging
-import pygame
-from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
-from collections import deque
-import time
+from collections import OrderedDict
+from functools import lru_cache
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Таблица цветов magma (256 значений RGBA) — matplotlib нужен только за этим,
+# сам рендеринг идёт напрямую в QImage без Figure/FigureCanvas
+_MAGMA_LUT = (plt.get_cmap('magma')(np.linspace(0, 1, 256)) * 255).astype(np.uint8)
+
+# Та же палитра как таблица цветов QImage.Format_Indexed8: 8 бит на пиксель
+# вместо 32, вчетверо меньше памяти и трафика при масштабировании
+_MAGMA_COLOR_TABLE = [QColor(int(r), int(g), int(b)).rgb() for r, g, b, _ in _MAGMA_LUT]
+
+# Дискретная лестница масштабов: фиксированные уровни позволяют Qt
+# использовать быстрые целочисленные пути масштабирования и делают кэш
+# тайлов переиспользуемым при возврате на тот же уровень
+_ZOOM_LADDER = (0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 4.0, 5.0)
+
+# Поля вокруг области данных в итоговом изображении (пиксели)
+_MARGIN_LEFT = 60
+_MARGIN_RIGHT = 20
+_MARGIN_TOP = 30
+_MARGIN_BOTTOM = 30
+
+# Опциональный бэкенд pyFFTW: если установлен, scipy.fft прозрачно
+# использует FFTW с кэшем планов и всеми ядрами CPU
+try:
+    import pyfftw
+    import scipy.fft as _scipy_fft
+
+    pyfftw.interfaces.cache.enable()
+    pyfftw.config.NUM_THREADS = os.cpu_count()
+    _scipy_fft.set_global_backend(pyfftw.interfaces.scipy_fft)
+    logging.info(f"pyFFTW подключён как бэкенд scipy.fft ({pyfftw.config.NUM_THREADS} потоков)")
+except ImportError:
+    pass
+
+# Запасной вариант без scipy: JIT-компилируем покадровый STFT через numba
+# (rocket-fft добавляет поддержку np.fft внутри njit)
+_stft_numba = None
+if rfft is None and njit is not None:
+    try:
+        import rocket_fft  # noqa: F401
+
+        @njit(parallel=True, fastmath=True, cache=True)
+        def _stft_numba(signal, window, step_size, nfft):
+            n_frames = (signal.size - window.size) // step_size + 1
+            out = np.empty((n_frames, nfft // 2 + 1), dtype=np.float32)
+            for i in prange(n_frames):
+                segment = signal[i * step_size:i * step_size + window.size] * window
+                fft_result = np.fft.rfft(segment, nfft)
+                out[i] = (fft_result.real ** 2 + fft_result.imag ** 2).astype(np.float32)
+            return out
+
+        logging.info("scipy не найден, STFT будет считаться через numba + rocket-fft")
+    except ImportError:
+        pass
+
+# Опциональный GPU-путь: батчевый rfft через cuFFT для очень длинных файлов.
+# Амплитуда считается на устройстве, по PCIe возвращается уже |S| (float32)
+try:
+    import cupy as cp
+    from cupyx.scipy.fft import rfft as _gpu_rfft
+except ImportError:
+    cp = None
+
+# Минимальное число кадров, при котором выгрузка на GPU окупает копирование
+_GPU_MIN_FRAMES = 8192
+
+# Слитое ядро dB + квантование: один проход по матрице сразу в uint8,
+# без float-временных массивов между log10, нормировкой и clip
+_quantize_db_numba = None
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _quantize_db_numba(power, out, vmin, vmax):
+        scale = 255.0 / (vmax - vmin) if vmax > vmin else 1.0
+        for i in prange(power.shape[0]):
+            for j in range(power.shape[1]):
+                v = (10.0 * math.log10(power[i, j] + 1e-12) - vmin) * scale
+                out[i, j] = 0 if v < 0 else (255 if v > 255 else np.uint8(v))
+
 def read_audio_file(file_path):
     """
-    Читает весь аудиофайл и возвращает сигнал и частоту дискретизации.
+    Читает весь аудиофайл и возвращает сигнал (float32) и частоту дискретизации.
+    Одинарной точности достаточно для спектрограммы, а памяти и трафика
+    через FFT она требует вдвое меньше, чем float64.
     """
     logging.info(f"Загрузка аудиофайла: {file_path}")
-    y, sr = sf.read(file_path)
+    y, sr = sf.read(file_path, dtype='float32', always_2d=False)
     if len(y.shape) > 1:  # Если стерео, берём только один канал
         y = y[:, 0]
     return y, sr
 
-def standard_fft_spectrogram(signal, sample_rate, window_size, step_size):
-    spectrogram = []
-    window = np.hanning(window_size)
+@lru_cache(maxsize=8)
+def _hann(window_size):
+    """Окно Ханна фиксированной длины; кэшируется между вызовами STFT."""
+    return np.hanning(window_size).astype(np.float32)
 
-    for start in range(0, len(signal) - window_size, step_size):
-        segment = signal[start:start + window_size] * window
-        fft_result = np.fft.fft(segment)
-        magnitude = np.abs(fft_result[:window_size // 2])
-        spectrogram.append(magnitude)
+def standard_fft_spectrogram(signal, sample_rate, window_size, step_size):
+    window = _hann(window_size)
+
+    # Дополняем до "быстрой" длины FFT, чтобы не попасть на медленный
+    # план pocketfft при нестандартном window_size (например, простом числе)
+    nfft = next_fast_len(window_size, real=True)
+    if nfft != window_size:
+        logging.info(f"FFT: window_size={window_size} дополнен до nfft={nfft}")
+
+    n_bins = window_size // 2 + 1
+    if rfft is None and _stft_numba is not None:
+        spectrogram = _stft_numba(np.ascontiguousarray(signal), window, step_size, nfft)[:, :n_bins].T
+    else:
+        # Кадры собираются в один заранее выделенный непрерывный буфер
+        # (копия zero-copy представления), окно умножается на месте —
+        # батчевый FFT получает данные уже оконными, без лишних временных
+        n_frames = (len(signal) - window_size) // step_size + 1
+        frames = np.empty((n_frames, window_size), dtype=np.float32)
+        frames[:] = np.lib.stride_tricks.sliding_window_view(signal, window_size)[::step_size]
+        np.multiply(frames, window, out=frames)
+        # Дальше нужен только dB, поэтому считаем мощность re²+im² и
+        # экономим sqrt внутри np.abs: 10*log10(P) == 20*log10(|S|)
+        if cp is not None and n_frames >= _GPU_MIN_FRAMES:
+            device_fft = _gpu_rfft(cp.asarray(frames), n=nfft, axis=1)[:, :n_bins]
+            spectrogram = cp.asnumpy(device_fft.real ** 2 + device_fft.imag ** 2).T
+        elif rfft is not None:
+            # Один батчевый real-FFT вместо цикла по кадрам
+            fft_result = rfft(frames, n=nfft, axis=1, workers=-1)[:, :n_bins]
+            spectrogram = (fft_result.real ** 2 + fft_result.imag ** 2).T
+        else:
+            fft_result = np.fft.rfft(frames, n=nfft, axis=1)[:, :n_bins]
+            spectrogram = (fft_result.real ** 2 + fft_result.imag ** 2).T
 
-    spectrogram = np.array(spectrogram).T
     time = np.arange(spectrogram.shape[1]) * (step_size / sample_rate)
-    freq = np.fft.fftfreq(window_size, d=1/sample_rate)[:window_size // 2]
+    freq = rfftfreq(nfft, d=1/sample_rate)[:n_bins]
 
     return spectrogram, time, freq
 
-def process_full_audio(signal, sample_rate, window_size, step_size, chunk_duration_sec):
-    chunk_size = int(chunk_duration_sec * sample_rate)
-    full_spectrogram = []
-    full_time = []
+def process_full_audio(signal, sample_rate, window_size, step_size):
+    """
+    Считает спектрограмму всего сигнала одним батчевым rfft.
+    Чанкование больше не нужно: кадры формируются zero-copy представлением,
+    так что единственная крупная аллокация — сам результат.
+    """
+    n_bins = window_size // 2 + 1
 
-    for i in range(0, len(signal), chunk_size):
-        chunk = signal[i:i + chunk_size]
-        if len(chunk) < window_size:
-            break
+    if len(signal) < window_size:
+        freq = rfftfreq(next_fast_len(window_size, real=True), d=1/sample_rate)[:n_bins]
+        return np.empty((n_bins, 0), dtype=np.float32), np.empty(0), freq
 
-        spectrogram, time, freq = standard_fft_spectrogram(chunk, sample_rate, window_size, step_size)
-        if len(full_spectrogram) == 0:
-            full_spectrogram = spectrogram
-        else:
-            full_spectrogram = np.hstack((full_spectrogram, spectrogram))
-        if len(full_time) == 0:
-            full_time = time + i / sample_rate
-        else:
-            full_time = np.concatenate((full_time, time + i / sample_rate))
+    return standard_fft_spectrogram(signal, sample_rate, window_size, step_size)
 
-    return full_spectrogram, full_time, freq
+def to_db_inplace(spectrogram):
+    """
+    Переводит спектрограмму мощности в децибелы на месте
+    (10*log10(P + 1e-12), что равно 20*log10(|S| + eps)), одним проходом
+    по массиву и без временных копий размером с матрицу.
+    """
+    np.add(spectrogram, 1e-12, out=spectrogram)
+    np.log10(spectrogram, out=spectrogram)
+    spectrogram *= 10
+    return spectrogram
 
-def create_spectrogram_image(spectrogram, time, freq, width_pixels, height_pixels=600):
+def quantize_spectrogram(spectrogram):
+    """
+    Переводит линейную спектрограмму в dB и квантует в uint8 (0..255) по
+    автодиапазону. Компактная uint8-матрица — единственное, что нужно
+    хранить для отрисовки: цвет восстанавливается по LUT.
+    """
+    if _quantize_db_numba is not None:
+        # Диапазон dB выводится из min/max линейной амплитуды (log монотонен),
+        # так что всё остальное делает одно слитое numba-ядро
+        vmin = 10.0 * math.log10(float(spectrogram.min()) + 1e-12)
+        vmax = 10.0 * math.log10(float(spectrogram.max()) + 1e-12)
+        out = np.empty(spectrogram.shape, dtype=np.uint8)
+        _quantize_db_numba(spectrogram, out, vmin, vmax)
+        return out
+
+    db = to_db_inplace(spectrogram)
+    vmin = float(db.min())
+    vmax = float(db.max())
+    scale = 255.0 / (vmax - vmin) if vmax > vmin else 1.0
+    return np.clip((db - vmin) * scale, 0, 255).astype(np.uint8)
+
+def build_lod_levels(idx, max_levels=4):
+    """
+    Строит пирамиду уровней детализации: каждый следующий уровень вдвое уже
+    по столбцам. Прореживание через поэлементный максимум пар столбцов, чтобы
+    короткие всплески не пропадали на уменьшенных уровнях.
+    """
+    levels = [idx]
+    for _ in range(max_levels - 1):
+        current = levels[-1]
+        w = current.shape[1]
+        if w < 2048:
+            break
+        even = current[:, :(w // 2) * 2]
+        levels.append(np.maximum(even[:, ::2], even[:, 1::2]))
+    return levels
+
+def create_spectrogram_image(idx, time, freq, width_pixels, height_pixels=600,
+                             transformation=Qt.SmoothTransformation):
     """
     Создаёт начальное изображение спектрограммы без линии воспроизведения.
-    Возвращает изображение и границы области спектрограммы.
+    Рендерит напрямую: uint8 индексы -> LUT magma -> QImage, без matplotlib
+    Figure. Возвращает изображение и границы области данных.
     """
-    logging.info(f"Создание спектрограммы: размер={spectrogram.shape}, время={time.shape}, частоты={freq.shape}")
-    if spectrogram.size == 0 or time.size == 0 or freq.size == 0:
+    logging.info(f"Создание спектрограммы: размер={idx.shape}, время={time.shape}, частоты={freq.shape}")
+    if idx.size == 0 or time.size == 0 or freq.size == 0:
         logging.error("Некорректные данные спектрограммы")
         return None, None
 
-    # Динамические размеры фигуры
-    fig_width = max(12, min(width_pixels / 100, 50))
-    fig, ax = plt.subplots(figsize=(fig_width, 6))
-    im = ax.imshow(
-        20 * np.log10(spectrogram + 1e-6),
-        aspect='auto',
-        origin='lower',
-        extent=[time[0], time[-1], freq[0], freq[-1]],
-        cmap='magma'
+    # Низкие частоты внизу (как origin='lower'); индексированное 8-битное
+    # изображение с палитрой вместо развёрнутого RGBA-буфера
+    flipped = np.ascontiguousarray(idx[::-1])
+    h, w = idx.shape
+    heatmap = QImage(flipped.data, w, h, w, QImage.Format_Indexed8)
+    heatmap.setColorTable(_MAGMA_COLOR_TABLE)
+
+    # Компонуем итоговое изображение: поля + растянутая тепловая карта
+    plot_width = max(width_pixels - _MARGIN_LEFT - _MARGIN_RIGHT, 1)
+    plot_height = max(height_pixels - _MARGIN_TOP - _MARGIN_BOTTOM, 1)
+    image = QImage(width_pixels, height_pixels, QImage.Format_RGB32)
+    image.fill(Qt.white)
+
+    painter = QPainter(image)
+    painter.drawImage(
+        _MARGIN_LEFT, _MARGIN_TOP,
+        heatmap.scaled(plot_width, plot_height, Qt.IgnoreAspectRatio, transformation)
     )
-    ax.set_xlabel('Час [с]')
-    ax.set_ylabel('Частота [Гц]')
-    ax.set_title("FFT спектрограмма")
-    fig.colorbar(im, ax=ax, label='Амплітуда [dB]')
+    painter.setPen(QColor(Qt.black))
+
+    # Заголовок и подписи осей
+    painter.drawText(0, 0, width_pixels, _MARGIN_TOP, Qt.AlignCenter, "FFT спектрограмма")
+    n_time_ticks = max(2, min(20, int(plot_width / 100)))
+    for frac in np.linspace(0, 1, n_time_ticks):
+        tick_time = time[0] + frac * (time[-1] - time[0])
+        x = int(_MARGIN_LEFT + frac * plot_width)
+        painter.drawText(x - 40, _MARGIN_TOP + plot_height, 80, _MARGIN_BOTTOM,
+                         Qt.AlignCenter, f"{tick_time:.1f} с")
+    for frac in np.linspace(0, 1, 6):
+        tick_freq = freq[0] + frac * (freq[-1] - freq[0])
+        y = int(_MARGIN_TOP + (1 - frac) * plot_height)
+        painter.drawText(0, y - 8, _MARGIN_LEFT - 5, 16,
+                         Qt.AlignRight | Qt.AlignVCenter, f"{tick_freq:.0f}")
+    painter.end()
 
-    # Уменьшаем отступы
-    fig.subplots_adjust(left=0.05, right=0.95, top=0.9, bottom=0.1)
-
-    # Получаем границы области спектрограммы
-    ax_pos = ax.get_position()
     data_area = {
-        'x0': ax_pos.x0,
-        'x1': ax_pos.x1,
-        'width': ax_pos.width
+        'x0': _MARGIN_LEFT / width_pixels,
+        'x1': (_MARGIN_LEFT + plot_width) / width_pixels,
+        'width': plot_width / width_pixels
     }
     logging.info(f"Границы области спектрограммы: x0={data_area['x0']:.2f}, x1={data_area['x1']:.2f}, width={data_area['width']:.2f}")
 
-    # Рендеринг в изображение
-    canvas = FigureCanvas(fig)
-    canvas.draw()
-    buf = canvas.buffer_rgba()
-    width, height = fig.canvas.get_width_height()
-    image = QImage(buf, width, height, QImage.Format_RGBA8888)
-    
-    plt.close(fig)
     return image, data_area
 
 def format_time(seconds):
@@ -116,14 +282,136 @@ def format_time(seconds):
     secs = int(seconds % 60)
     return f"{minutes:02d}:{secs:02d}"
 
+class SpectrogramView(QAbstractScrollArea):
+    """
+    Виртуализированный просмотр спектрограммы: в памяти живёт только uint8
+    матрица индексов (и её LOD-пирамида), а QImage-тайлы рендерятся по
+    запросу для видимой части вьюпорта и кэшируются в небольшом LRU.
+    Загрузка больше не зависит от длины файла — рисуется только экран.
+    """
+
+    TILE_WIDTH = 256
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._lod_levels = None
+        self._level = None  # Уровень пирамиды, выбранный под текущий зум
+        self._base_width = 800
+        self._zoom = 1.0
+        self._duration = 0.0
+        self._play_position = 0.0
+        self._transformation = Qt.SmoothTransformation
+        self._tile_cache = OrderedDict()
+        self._cache_limit = 64
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+
+    def set_data(self, lod_levels, duration, base_width):
+        self._lod_levels = lod_levels
+        self._duration = duration
+        self._base_width = base_width
+        self._play_position = 0.0
+        self.set_zoom(1.0)
+        self.horizontalScrollBar().setValue(0)
+
+    def set_zoom(self, zoom, transformation=Qt.SmoothTransformation):
+        self._zoom = zoom
+        self._transformation = transformation
+        if self._lod_levels:
+            # Самый узкий уровень, где столбцов не меньше, чем пикселей
+            content_width = self._content_width()
+            self._level = self._lod_levels[0]
+            for level in reversed(self._lod_levels):
+                if level.shape[1] >= content_width:
+                    self._level = level
+                    break
+        self._tile_cache.clear()
+        self._update_scrollbars()
+        self.viewport().update()
+
+    def set_play_position(self, seconds):
+        self._play_position = seconds
+        # Держим линию воспроизведения по центру вьюпорта
+        if self._duration > 0:
+            x = int(seconds / self._duration * self._content_width())
+            self.horizontalScrollBar().setValue(x - self.viewport().width() // 2)
+        self.viewport().update()
+
+    def _content_width(self):
+        return max(int(self._base_width * self._zoom), 1)
+
+    def _update_scrollbars(self):
+        bar = self.horizontalScrollBar()
+        bar.setRange(0, max(0, self._content_width() - self.viewport().width()))
+        bar.setPageStep(self.viewport().width())
+
+    def _tile(self, tile_index):
+        tile = self._tile_cache.get(tile_index)
+        if tile is not None:
+            self._tile_cache.move_to_end(tile_index)
+            return tile
+
+        content_width = self._content_width()
+        x0 = tile_index * self.TILE_WIDTH
+        tile_width = min(self.TILE_WIDTH, content_width - x0)
+        level_width = self._level.shape[1]
+        c0 = x0 * level_width // content_width
+        c1 = max((x0 + tile_width) * level_width // content_width, c0 + 1)
+
+        # Низкие частоты внизу (как origin='lower'); 8-битный Indexed8 с
+        # палитрой magma, растянутый до размера тайла
+        block = np.ascontiguousarray(self._level[::-1, c0:c1])
+        h, w = block.shape
+        image = QImage(block.data, w, h, w, QImage.Format_Indexed8)
+        image.setColorTable(_MAGMA_COLOR_TABLE)
+        tile = image.scaled(tile_width, self.viewport().height(),
+                            Qt.IgnoreAspectRatio, self._transformation)
+
+        self._tile_cache[tile_index] = tile
+        while len(self._tile_cache) > self._cache_limit:
+            self._tile_cache.popitem(last=False)
+        return tile
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        if self._level is None:
+            painter.fillRect(self.viewport().rect(), QColor(Qt.black))
+            return
+
+        offset = self.horizontalScrollBar().value()
+        view_width = self.viewport().width()
+        content_width = self._content_width()
+        first = offset // self.TILE_WIDTH
+        last = min((offset + view_width - 1) // self.TILE_WIDTH,
+                   (content_width - 1) // self.TILE_WIDTH)
+        for i in range(first, last + 1):
+            painter.drawImage(i * self.TILE_WIDTH - offset, 0, self._tile(i))
+
+        # Линия воспроизведения
+        if self._duration > 0:
+            x = int(self._play_position / self._duration * content_width) - offset
+            if 0 <= x < view_width:
+                painter.setPen(QPen(QColor(Qt.white), 4, Qt.DashLine))
+                painter.drawLine(x, 0, x, self.viewport().height())
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+
+    def resizeEvent(self, event):
+        self._tile_cache.clear()
+        self._update_scrollbars()
+        super().resizeEvent(event)
+
 class SpectrogramWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("FFT спектрограмма")
         self.setGeometry(100, 100, 800, 600)
 
-        # Инициализация pygame для аудио
-        pygame.mixer.init()
+        # Плеер Qt: позиция приходит сигналом positionChanged с точностью до
+        # миллисекунд — без опроса таймером и усреднения по time.time()
+        self.player = QMediaPlayer(self)
+        self.player.positionChanged.connect(self.update_play_position)
+        self.player.mediaStatusChanged.connect(self._on_media_status)
 
         # Основной виджет и компоновка
         self.central_widget = QWidget()
@@ -176,19 +464,12 @@ class SpectrogramWindow(QMainWindow):
         self.seek_slider.sliderMoved.connect(self.seek_position)
         self.layout.addWidget(self.seek_slider)
 
-        # Область прокрутки
-        self.scroll_area = QScrollArea(self)
-        self.scroll_area.setWidgetResizable(True)
-        self.layout.addWidget(self.scroll_area)
-
-        # Метка для отображения спектрограммы
-        self.spectrogram_label = QLabel(self)
-        self.spectrogram_label.setAlignment(Qt.AlignTop | Qt.AlignLeft)
-        self.scroll_area.setWidget(self.spectrogram_label)
+        # Виртуализированный просмотр спектрограммы
+        self.spectrogram_view = SpectrogramView(self)
+        self.layout.addWidget(self.spectrogram_view)
 
         # Переменные
         self.audio_file = None
-        self.spectrogram_image = None
         self.spectrogram = None
         self.time = None
         self.freq = None
@@ -196,15 +477,16 @@ class SpectrogramWindow(QMainWindow):
         self.play_position = 0
         self.total_duration = 0
         self.image_width = 800
-        self.position_buffer = deque(maxlen=5)
-        self.log_counter = 0
-        self.data_area = None
         self.zoom_factor = 1.0
-        self.play_start_time = 0  # Время начала воспроизведения или последней перемотки
+        self._idx = None  # uint8-квантованная dB-спектрограмма для отрисовки
+        self._lod_levels = None  # Пирамида прореженных уровней self._idx
 
-        # Таймер для обновления позиции воспроизведения
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_play_position)
+        # Отложенное «сглаживание» после серии кликов зума: во время зума
+        # показываем быстрый nearest-neighbor, плавную версию — через 200 мс
+        self._smooth_zoom_timer = QTimer(self)
+        self._smooth_zoom_timer.setSingleShot(True)
+        self._smooth_zoom_timer.setInterval(200)
+        self._smooth_zoom_timer.timeout.connect(self.update_spectrogram_display)
 
     def load_audio(self):
         file_path, _ = QFileDialog.getOpenFileName(
@@ -220,9 +502,8 @@ class SpectrogramWindow(QMainWindow):
         # Генерируем спектрограмму
         window_size = 1024
         step_size = 512
-        chunk_duration_sec = 4
         self.spectrogram, self.time, self.freq = process_full_audio(
-            audio_data, sample_rate, window_size, step_size, chunk_duration_sec
+            audio_data, sample_rate, window_size, step_size
         )
 
         # Проверяем данные
@@ -237,19 +518,12 @@ class SpectrogramWindow(QMainWindow):
         self.zoom_factor = 1.0
         logging.info(f"Длительность аудио: {self.total_duration:.2f} секунд, ширина изображения: {self.image_width} пикселей")
 
-        # Создаём начальное изображение спектрограммы
-        self.spectrogram_image, self.data_area = create_spectrogram_image(
-            self.spectrogram, self.time, self.freq, self.image_width
-        )
-        if self.spectrogram_image is None:
-            QMessageBox.critical(self, "Ошибка", "Не удалось создать изображение спектрограммы!")
-            return
-
-        self.spectrogram_label.setPixmap(QPixmap.fromImage(self.spectrogram_image))
-        self.spectrogram_label.adjustSize()
+        # Квантуем в uint8 один раз, дальше вся отрисовка идёт по self._idx
+        self._idx = quantize_spectrogram(self.spectrogram)
+        self._lod_levels = build_lod_levels(self._idx)
 
-        # Сбрасываем прокрутку
-        self.scroll_area.horizontalScrollBar().setValue(0)
+        # Передаём данные во вьюпорт: тайлы рендерятся по мере прокрутки
+        self.spectrogram_view.set_data(self._lod_levels, self.total_duration, self.image_width)
         logging.info("Прокрутка сброшена на начало")
 
         # Обновляем индикатор времени
@@ -259,15 +533,9 @@ class SpectrogramWindow(QMainWindow):
         self.seek_slider.setValue(0)
         logging.info("Слайдер сброшен на начало")
 
-        # Загружаем аудио в pygame
-        try:
-            pygame.mixer.music.load(file_path)
-            logging.info("Аудио успешно загружено в pygame")
-        except pygame.error as e:
-            logging.error(f"Ошибка загрузки аудио в pygame: {e}")
-            QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить аудио: {e}")
-            self.audio_file = None
-            return
+        # Загружаем аудио в плеер
+        self.player.setMedia(QMediaContent(QUrl.fromLocalFile(file_path)))
+        logging.info("Аудио загружено в QMediaPlayer")
 
     def toggle_playback(self):
         if not self.audio_file:
@@ -275,41 +543,30 @@ class SpectrogramWindow(QMainWindow):
             return
 
         if self.is_playing:
-            pygame.mixer.music.pause()
+            self.player.pause()
             self.is_playing = False
-            self.timer.stop()
             logging.info("Воспроизведение приостановлено")
         else:
-            try:
-                if pygame.mixer.music.get_pos() == -1:  # Если трек не начат
-                    pygame.mixer.music.play(start=self.play_position)
-                    self.play_start_time = time.time()
-                    self.position_buffer.clear()
-                    logging.info(f"Воспроизведение начато с {self.play_position:.2f} сек")
-                else:
-                    pygame.mixer.music.unpause()
-                    self.play_start_time = time.time() - self.play_position
-                    logging.info("Воспроизведение возобновлено")
-                self.is_playing = True
-                self.timer.start(50)
-            except pygame.error as e:
-                logging.error(f"Ошибка воспроизведения: {e}")
-                QMessageBox.critical(self, "Ошибка", f"Не удалось воспроизвести аудио: {e}")
-                return
+            self.player.play()
+            self.is_playing = True
+            logging.info(f"Воспроизведение начато с {self.play_position:.2f} сек")
 
     def stop_playback(self):
         if self.audio_file:
-            pygame.mixer.music.stop()
+            self.player.stop()
             self.is_playing = False
-            self.timer.stop()
             self.play_position = 0
-            self.position_buffer.clear()
-            if self.spectrogram is not None and self.spectrogram_image is not None:
-                self.update_spectrogram_display()
+            if self._idx is not None:
+                self.spectrogram_view.set_play_position(0)
             self.seek_slider.setValue(0)
             self.time_label.setText(f"00:00 / {format_time(self.total_duration)}")
             logging.info("Воспроизведение остановлено")
 
+    def _on_media_status(self, status):
+        if status == QMediaPlayer.EndOfMedia:
+            logging.info("Воспроизведение завершено")
+            self.stop_playback()
+
     def seek_position(self, value):
         """
         Перематывает трек на позицию, указанную слайдером.
@@ -318,68 +575,53 @@ class SpectrogramWindow(QMainWindow):
             # Переводим значение слайдера (0–1000) в секунды
             new_position = (value / 1000.0) * self.total_duration
             self.play_position = new_position
-            self.position_buffer.clear()
-            self.position_buffer.append(new_position)
-            
-            # Перематываем аудио
-            try:
-                pygame.mixer.music.stop()
-                pygame.mixer.music.load(self.audio_file)
-                pygame.mixer.music.play(start=new_position)
-                if not self.is_playing:
-                    pygame.mixer.music.pause()  # Оставляем в паузе, если не воспроизводится
-                self.play_start_time = time.time() - new_position
-                logging.info(f"Перемотка на позицию: {new_position:.2f} сек (слайдер={value})")
-                
-                # Обновляем спектрограмму и прокрутку
-                self.update_spectrogram_display()
-                self.update_play_position()
-            except pygame.error as e:
-                logging.error(f"Ошибка при перемотке: {e}")
-                QMessageBox.critical(self, "Ошибка", f"Не удалось перемотать аудио: {e}")
+            self.player.setPosition(int(new_position * 1000))
+            logging.info(f"Перемотка на позицию: {new_position:.2f} сек (слайдер={value})")
+
+            # Обновляем линию и прокрутку
+            self.update_play_position(int(new_position * 1000))
 
     def zoom_in(self):
-        if self.spectrogram_image:
-            self.zoom_factor = min(self.zoom_factor * 1.2, 5.0)
-            self.update_spectrogram_display()
-            logging.info(f"Zoom In: масштаб={self.zoom_factor:.2f}")
+        if self._idx is not None:
+            higher = [z for z in _ZOOM_LADDER if z > self.zoom_factor]
+            if higher:
+                self.zoom_factor = higher[0]
+                self._preview_zoom()
+                logging.info(f"Zoom In: масштаб={self.zoom_factor:.2f}")
 
     def zoom_out(self):
-        if self.spectrogram_image and self.zoom_factor > 0.5:
-            self.zoom_factor /= 1.2
-            self.update_spectrogram_display()
-            logging.info(f"Zoom Out: масштаб={self.zoom_factor:.2f}")
+        if self._idx is not None:
+            lower = [z for z in _ZOOM_LADDER if z < self.zoom_factor]
+            if lower:
+                self.zoom_factor = lower[-1]
+                self._preview_zoom()
+                logging.info(f"Zoom Out: масштаб={self.zoom_factor:.2f}")
+
+    def _preview_zoom(self):
+        """
+        Мгновенный предпросмотр зума через nearest-neighbor; качественная
+        перерисовка запускается таймером после последнего клика.
+        """
+        self.update_spectrogram_display(Qt.FastTransformation)
+        self._smooth_zoom_timer.start()
+
+    def update_spectrogram_display(self, transformation=Qt.SmoothTransformation):
+        """
+        Применяет текущий масштаб к виртуализированному просмотру; тайлы
+        перерендериваются лениво по мере прокрутки.
+        """
+        if self._idx is None:
+            return
+        self.spectrogram_view.set_zoom(self.zoom_factor, transformation)
+        logging.info(f"Обновлено изображение: масштаб={self.zoom_factor:.2f}")
 
-    def update_spectrogram_display(self):
+    def update_play_position(self, position_ms):
         """
-        Обновляет отображение спектрограммы с учётом текущего масштаба.
+        Слот positionChanged: перерисовывает линию воспроизведения по
+        миллисекундной позиции плеера.
         """
-        if self.spectrogram_image:
-            scaled_pixmap = QPixmap.fromImage(self.spectrogram_image).scaled(
-                int(self.image_width * self.zoom_factor),
-                int(self.spectrogram_image.height() * self.zoom_factor),
-                Qt.KeepAspectRatio,
-                Qt.SmoothTransformation
-            )
-            self.spectrogram_label.setPixmap(scaled_pixmap)
-            self.spectrogram_label.adjustSize()
-            logging.info(f"Обновлено изображение: ширина={scaled_pixmap.width()}, высота={scaled_pixmap.height()}")
-
-    def update_play_position(self):
-        if self.is_playing and self.spectrogram is not None and self.spectrogram_image is not None:
-            # Обновляем позицию на основе системного времени
-            if pygame.mixer.music.get_busy():
-                self.play_position = time.time() - self.play_start_time
-                if self.play_position > self.total_duration:
-                    self.play_position = self.total_duration
-                    self.stop_playback()
-                    return
-                self.position_buffer.append(self.play_position)
-                self.play_position = sum(self.position_buffer) / len(self.position_buffer)
-            else:
-                logging.warning("Воспроизведение завершено")
-                self.stop_playback()
-                return
+        if self._idx is not None:
+            self.play_position = min(position_ms / 1000.0, self.total_duration)
 
             # Обновляем индикатор времени
             self.time_label.setText(f"{format_time(self.play_position)} / {format_time(self.total_duration)}")
@@ -389,53 +631,18 @@ class SpectrogramWindow(QMainWindow):
                 slider_value = int((self.play_position / self.total_duration) * 1000)
                 self.seek_slider.setValue(slider_value)
 
-            # Логируем раз в ~1 сек
-            self.log_counter += 1
-            if self.log_counter % 20 == 0:
-                logging.info(f"Позиция воспроизведения: {self.play_position:.2f} сек")
-
-            # Создаём копию изображения с учётом масштаба
-            scaled_pixmap = QPixmap.fromImage(self.spectrogram_image).scaled(
-                int(self.image_width * self.zoom_factor),
-                int(self.spectrogram_image.height() * self.zoom_factor),
-                Qt.KeepAspectRatio,
-                Qt.SmoothTransformation
-            )
-            painter = QPainter(scaled_pixmap)
-            pen = QPen(QColor(Qt.white), 4, Qt.DashLine)
-            painter.setPen(pen)
-            max_time = self.time[-1]
-            if max_time > 0 and self.data_area is not None:
-                # Масштабируем x_pos на область данных с учётом зума
-                data_width_pixels = scaled_pixmap.width() * self.data_area['width']
-                data_x0_pixels = scaled_pixmap.width() * self.data_area['x0']
-                x_pos = int((self.play_position / max_time) * data_width_pixels + data_x0_pixels)
-                x_pos = min(max(x_pos, 0), scaled_pixmap.width() - 1)
-                if self.log_counter % 20 == 0:
-                    logging.info(f"Позиция линии: {x_pos} пикселей (x0_pixels={data_x0_pixels:.1f})")
-                painter.drawLine(x_pos, 0, x_pos, scaled_pixmap.height())
-            painter.end()
-
-            # Обновляем изображение
-            self.spectrogram_label.setPixmap(scaled_pixmap)
-
-            # Прокручиваем область, чтобы линия была в центре
-            if self.time is not None and max_time > 0:
-                scroll_range = self.spectrogram_label.pixmap().width() - self.scroll_area.width()
-                if scroll_range > 0:
-                    scroll_pos = int(x_pos - self.scroll_area.width() / 2)
-                    scroll_pos = min(max(scroll_pos, 0), scroll_range)
-                    self.scroll_area.horizontalScrollBar().setValue(scroll_pos)
-                    if self.log_counter % 20 == 0:
-                        logging.info(f"Позиция прокрутки: {scroll_pos} пикселей")
+            # Линию и автопрокрутку рисует сам вьюпорт
+            self.spectrogram_view.set_play_position(self.play_position)
 
     def save_spectrogram(self):
-        if self.audio_file is None or self.spectrogram_image is None:
+        if self.audio_file is None or self._idx is None:
             QMessageBox.critical(self, "Ошибка", "Сначала загрузите аудиофайл!")
             return
 
+        # Для файла рендерим полную спектрограмму с подписями осей
+        image, _ = create_spectrogram_image(self._idx, self.time, self.freq, self.image_width)
         output_path = os.path.splitext(self.audio_file)[0] + "_fft_spectrogram.png"
-        self.spectrogram_image.save(output_path)
+        image.save(output_path)
         file_size_mb = os.path.getsize(output_path) / (1024 * 1024)
         QMessageBox.information(
             self, "Сохранено", 
@@ -443,7 +650,7 @@ class SpectrogramWindow(QMainWindow):
         )
 
     def closeEvent(self, event):
-        pygame.mixer.quit()
+        self.player.stop()
         event.accept()
 
 def main():